@@ -0,0 +1,14 @@
+-- Wake idle workers on new jobs instead of having them poll video_jobs
+
+create or replace function public.notify_video_job_new() returns trigger
+language plpgsql as $$
+begin
+	perform pg_notify('video_jobs_new', new.id::text);
+	return new;
+end;
+$$;
+
+drop trigger if exists trg_video_jobs_notify_new on public.video_jobs;
+create trigger trg_video_jobs_notify_new
+	after insert on public.video_jobs
+	for each row execute function public.notify_video_job_new();
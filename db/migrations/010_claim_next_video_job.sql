@@ -0,0 +1,15 @@
+-- Atomically claim the oldest queued job; SKIP LOCKED lets concurrent workers pick distinct rows
+
+create or replace function public.claim_next_video_job() returns setof public.video_jobs
+language sql as $$
+	update public.video_jobs
+	set status = 'processing', progress = 0, updated_at = now()
+	where id = (
+		select id from public.video_jobs
+		where status = 'queued'
+		order by created_at
+		limit 1
+		for update skip locked
+	)
+	returning *;
+$$;
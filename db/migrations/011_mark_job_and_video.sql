@@ -0,0 +1,18 @@
+-- Move a job and its video to the same status in one round-trip
+
+create or replace function public.mark_job_and_video(
+	p_job_id uuid,
+	p_video_id uuid,
+	p_status text,
+	p_progress int,
+	p_error text default null
+) returns void
+language plpgsql as $$
+begin
+	update public.video_jobs
+	set status = p_status, progress = p_progress, error = coalesce(p_error, error), updated_at = now()
+	where id = p_job_id;
+
+	update public.videos set status = p_status where id = p_video_id;
+end;
+$$;
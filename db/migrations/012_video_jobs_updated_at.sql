@@ -0,0 +1,14 @@
+-- Stamp updated_at server-side so clients no longer send their own timestamp
+
+create or replace function public.set_updated_at() returns trigger
+language plpgsql as $$
+begin
+	new.updated_at = now();
+	return new;
+end;
+$$;
+
+drop trigger if exists trg_video_jobs_updated_at on public.video_jobs;
+create trigger trg_video_jobs_updated_at
+	before update on public.video_jobs
+	for each row execute function public.set_updated_at();
@@ -0,0 +1,26 @@
+-- Store a processed video's transcript and candidates in one round-trip and one transaction
+
+create or replace function public.write_results(
+	p_video_id uuid,
+	p_transcript jsonb,
+	p_candidates jsonb
+) returns void
+language plpgsql as $$
+begin
+	insert into public.video_transcripts (video_id, transcript)
+	values (p_video_id, p_transcript);
+
+	-- Keys without a matching column (e.g. evidence, query_variants) are ignored
+	insert into public.video_candidates (
+		video_id, name, address_hint, latitude, longitude, confidence, start_ms, end_ms, source,
+		places_query, places_place_id, places_name, places_address, places_raw,
+		extraction_method, llm_prompt, llm_output, places_failed
+	)
+	select
+		p_video_id, c.name, c.address_hint, c.latitude, c.longitude, coalesce(c.confidence, 0.5),
+		c.start_ms, c.end_ms, c.source,
+		c.places_query, c.places_place_id, c.places_name, c.places_address, c.places_raw,
+		c.extraction_method, c.llm_prompt, c.llm_output, coalesce(c.places_failed, false)
+	from jsonb_populate_recordset(null::public.video_candidates, coalesce(p_candidates, '[]'::jsonb)) as c;
+end;
+$$;
@@ -0,0 +1,16 @@
+-- Also wake workers when a job is re-queued (POST /videos/:id/retry updates the existing row)
+
+create or replace function public.notify_video_job_new() returns trigger
+language plpgsql as $$
+begin
+	if new.status = 'queued' then
+		perform pg_notify('video_jobs_new', new.id::text);
+	end if;
+	return new;
+end;
+$$;
+
+drop trigger if exists trg_video_jobs_notify_new on public.video_jobs;
+create trigger trg_video_jobs_notify_new
+	after insert or update of status on public.video_jobs
+	for each row execute function public.notify_video_job_new();
@@ -1,11 +1,18 @@
+import functools
+import hashlib
 import json
 import os
 import re
+import sqlite3
+import tempfile
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from typing import Any, Dict, List, Optional, Tuple, Union
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 CATEGORY_WORDS = [
     "restaurant", "cafe", "bar", "bakery", "hotel", "museum", "park", "market", "store", "mall",
@@ -22,6 +29,25 @@ LOCATION_CUES = [
     "in", "at", "near", "next to", "on", "by", "across from", "around", "inside",
 ]
 
+_LOC_CUES_PADDED = tuple(f" {cue} " for cue in LOCATION_CUES)
+
+# One pass over the lowered text instead of a substring scan per keyword. Action/category
+# words match anywhere (as the old `in` checks did); location cues need spaces around them.
+# Kept case-sensitive: lowering once is much cheaper than an IGNORECASE search.
+_KEYWORD_RE = re.compile(
+    "|".join(re.escape(word) for word in (*_LOC_CUES_PADDED, *ACTION_WORDS, *CATEGORY_WORDS))
+)
+
+_DECODER = json.JSONDecoder()
+
+_FENCE_HEAD_RE = re.compile(r"^```(?:json)?\s*", re.IGNORECASE)
+_FENCE_TAIL_RE = re.compile(r"\s*```$")
+
+# Shared session so every Ollama call reuses the same keep-alive connection
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=0))
+_SESSION.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip, deflate"})
+
 
 @dataclass
 class OllamaResult:
@@ -37,41 +63,97 @@ class OllamaResult:
 
 
 def _looks_proper_nounish(text: str) -> bool:
-    tokens = [t for t in re.split(r"\s+", text) if t]
+    tokens = text.split()
     if len(tokens) < 2:
         return False
-    capitalized = sum(1 for t in tokens if t[:1].isupper())
-    return capitalized >= 2
+    capitalized = 0
+    for t in tokens:
+        if t[:1].isupper():
+            capitalized += 1
+            if capitalized >= 2:
+                return True
+    return False
 
 
 def _segment_matches(text: str) -> bool:
-    lowered = text.lower()
-    if any(word in lowered for word in ACTION_WORDS):
-        return True
-    if any(word in lowered for word in CATEGORY_WORDS):
-        return True
-    if any(f" {cue} " in lowered for cue in LOCATION_CUES):
+    if _KEYWORD_RE.search(text.lower()):
         return True
     return _looks_proper_nounish(text)
 
 
 def filter_segments(segments: List[Dict[str, Any]], max_segments: int = 120) -> List[Dict[str, Any]]:
-    if len(segments) <= max_segments:
-        return segments
-
-    keep_indices = set()
+    if max_segments <= 0:
+        return []
+
+    # Emit the +/-2 window around each hit in ascending order, stopping as soon as
+    # max_segments are collected instead of scanning the whole transcript. Applied to
+    # short transcripts too: segments outside every window cannot contribute a place.
+    filtered: List[Dict[str, Any]] = []
+    last_emitted = -1
+    last_index = len(segments) - 1
     for idx, segment in enumerate(segments):
-        text = str(segment.get("text", ""))
-        if _segment_matches(text):
-            for offset in range(-2, 3):
-                keep_indices.add(idx + offset)
-
-    filtered = [segments[i] for i in sorted(keep_indices) if 0 <= i < len(segments)]
-    if len(filtered) > max_segments:
-        filtered = filtered[:max_segments]
+        if not _segment_matches(str(segment.get("text", ""))):
+            continue
+        for i in range(max(idx - 2, last_emitted + 1), min(idx + 2, last_index) + 1):
+            filtered.append(segments[i])
+            if len(filtered) >= max_segments:
+                return filtered
+        last_emitted = max(last_emitted, min(idx + 2, last_index))
     return filtered
 
 
+def _drop_low_value_segments(segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Cheap pre-filters: drop near-empty segments and repeats (e.g. whisper loops)."""
+    kept: List[Dict[str, Any]] = []
+    seen = set()
+    for segment in segments:
+        text = str(segment.get("text", "")).strip()
+        if len(text) < 3:
+            continue
+        key = text.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(segment)
+    return kept
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 chars/token for latin text; CJK and other non-ASCII chars are ~1 token each
+    if text.isascii():
+        return len(text) // 4 + 1
+    ascii_chars = sum(1 for c in text if c < "\x80")
+    return (len(text) - ascii_chars) + ascii_chars // 4 + 1
+
+
+def pack_segments(
+    segments: List[Dict[str, Any]],
+    token_budget: int,
+    max_chars: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Greedily keep segments in order until the estimated token budget is spent, or until
+    their serialized JSON would pass max_chars (so call_ollama never has to cut it).
+    """
+    packed: List[Dict[str, Any]] = []
+    used = 0
+    used_chars = 0
+    for segment in segments:
+        cost = _estimate_tokens(str(segment.get("text", "")))
+        if used + cost > token_budget:
+            break
+        if max_chars is not None:
+            # +1 for the separating comma
+            chars = len(orjson.dumps(segment, default=str, option=orjson.OPT_NON_STR_KEYS)) + 1
+            if used_chars + chars > max_chars:
+                break
+            used_chars += chars
+        packed.append(segment)
+        used += cost
+    return packed
+
+
+@functools.lru_cache(maxsize=64)
 def build_prompt(location_hint: Optional[str]) -> str:
     hint_line = f"Location hint: {location_hint}" if location_hint else "Location hint: none"
     return (
@@ -100,11 +182,70 @@ def build_prompt(location_hint: Optional[str]) -> str:
     )
 
 
+class _TopLevelJsonTracker:
+    """Track bracket depth (outside strings) across chunks to spot where the top-level value closes."""
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def closes_top_level(self, piece: str) -> bool:
+        closed = False
+        for ch in piece:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]" and self.depth > 0:
+                self.depth -= 1
+                closed = closed or self.depth == 0
+        return closed
+
+
+def _read_chat_stream(resp: requests.Response) -> Tuple[str, Optional[str]]:
+    """
+    Accumulate streamed /api/chat NDJSON chunks and stop as soon as the
+    buffered content decodes as a complete JSON value, so the trailing
+    tokens the model would still generate are never waited on.
+    Returns (content, error_str).
+    """
+    chunks: List[str] = []
+    tracker = _TopLevelJsonTracker()
+    for line in resp.iter_lines():
+        if not line:
+            continue
+        data = orjson.loads(line)
+        if isinstance(data, dict) and data.get("error"):
+            return "".join(chunks), f"ollama_error: {data.get('error')}"
+        piece = (data.get("message") or {}).get("content") or ""
+        if piece:
+            chunks.append(piece)
+            # Only decode once the top-level value has closed, not on every nested '}'
+            if tracker.closes_top_level(piece):
+                try:
+                    _DECODER.raw_decode("".join(chunks).lstrip())
+                    break
+                except ValueError:
+                    pass
+        if data.get("done"):
+            break
+    return "".join(chunks), None
+
+
 def call_ollama(prompt: str, input_payload: Dict[str, Any]) -> Tuple[str, Optional[str]]:
     """
     Extra-safe Ollama call:
     - caps prompt/input size to avoid pathological latency
     - uses connect/read timeouts
+    - streams the response and hangs up once the JSON object is complete
     - retries on timeouts / transient failures
     - returns (response_text, error_str)
     """
@@ -126,10 +267,10 @@ def call_ollama(prompt: str, input_payload: Dict[str, Any]) -> Tuple[str, Option
 
     def _safe_json_dumps(obj: Any) -> str:
         try:
-            return json.dumps(obj, ensure_ascii=False, default=str)
+            return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
         except Exception:
             # Last-ditch: stringify
-            return json.dumps(str(obj), ensure_ascii=False)
+            return orjson.dumps(str(obj)).decode()
 
     # Serialize and cap input JSON
     input_json = _safe_json_dumps(input_payload)
@@ -144,15 +285,34 @@ def call_ollama(prompt: str, input_payload: Dict[str, Any]) -> Tuple[str, Option
         tail = full_prompt[-(MAX_TOTAL_PROMPT_CHARS // 2) :]
         full_prompt = head + "\n…(truncated middle)…\n" + tail
 
+    # Decoding options. num_ctx defaults to the prompt size plus generation headroom,
+    # rounded up to 2048 so Ollama doesn't reload the model for every small size change.
+    TEMPERATURE = float(os.getenv("OLLAMA_TEMPERATURE", "0"))
+    NUM_PREDICT = int(os.getenv("OLLAMA_NUM_PREDICT", "768"))
+    num_ctx_env = os.getenv("OLLAMA_NUM_CTX")
+    if num_ctx_env:
+        NUM_CTX = int(num_ctx_env)
+    else:
+        NUM_CTX = -(-(_estimate_tokens(full_prompt) + 1024) // 2048) * 2048
+
     payload = {
         "model": model,
-        "prompt": full_prompt,
-        "stream": False,
-        # Optional: you can set these if you want more determinism/speed
-        # "options": {"temperature": 0.2, "num_predict": 512},
+        "messages": [{"role": "user", "content": full_prompt}],
+        # Constrained decoding: the model can only emit valid JSON
+        "format": "json",
+        "stream": True,
+        # Keep the model resident between videos so later calls skip the load
+        "keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+        # Deterministic + bounded decoding: fewer invalid outputs, no runaway generations
+        "options": {
+            "temperature": TEMPERATURE,
+            "top_p": 1,
+            "num_predict": NUM_PREDICT,
+            "num_ctx": NUM_CTX,
+        },
     }
 
-    url = f"{base_url}/api/generate"
+    url = f"{base_url}/api/chat"
 
     # One helpful debug line (comment out later)
     # approx_tokens is rough; chars/4 is a decent heuristic
@@ -166,14 +326,23 @@ def call_ollama(prompt: str, input_payload: Dict[str, Any]) -> Tuple[str, Option
     }, flush=True)
 
     last_err: Optional[str] = None
+    # Encode once with orjson instead of letting requests re-run json.dumps on every retry
+    body = orjson.dumps(payload)
 
     for attempt in range(MAX_RETRIES + 1):
         try:
-            resp = requests.post(url, json=payload, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+            resp = _SESSION.post(
+                url,
+                data=body,
+                headers={"Content-Type": "application/json"},
+                stream=True,
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+            )
 
             # If Ollama returns non-200, include body preview for debugging
             if resp.status_code < 200 or resp.status_code >= 300:
                 body_preview = resp.text[:500]
+                resp.close()
                 last_err = f"ollama_http_{resp.status_code}: {body_preview}"
                 # Retry on 5xx (server error)
                 if resp.status_code >= 500 and attempt < MAX_RETRIES:
@@ -181,20 +350,18 @@ def call_ollama(prompt: str, input_payload: Dict[str, Any]) -> Tuple[str, Option
                     continue
                 return "", last_err
 
-            data = resp.json()
+            # Closing the response early tells Ollama to stop generating
+            with resp:
+                out, stream_err = _read_chat_stream(resp)
 
-            # Ollama sometimes includes an error field even on 200
-            if isinstance(data, dict) and data.get("error"):
-                last_err = f"ollama_error: {data.get('error')}"
+            # Ollama reports errors in-band even on 200
+            if stream_err:
+                last_err = stream_err
                 if attempt < MAX_RETRIES:
                     time.sleep(BACKOFF_SECONDS * (attempt + 1))
                     continue
                 return "", last_err
 
-            out = ""
-            if isinstance(data, dict):
-                out = data.get("response") or ""
-
             out = out.strip()
             if not out:
                 last_err = "ollama_empty_response"
@@ -229,8 +396,8 @@ def call_ollama(prompt: str, input_payload: Dict[str, Any]) -> Tuple[str, Option
 def _strip_code_fences(text: str) -> str:
     t = text.strip()
     if t.startswith("```"):
-        t = re.sub(r"^```(?:json)?\s*", "", t, flags=re.IGNORECASE)
-        t = re.sub(r"\s*```$", "", t)
+        t = _FENCE_HEAD_RE.sub("", t)
+        t = _FENCE_TAIL_RE.sub("", t)
     return t.strip()
 
 
@@ -244,63 +411,33 @@ def _extract_first_json(text: str) -> Optional[str]:
     # Fast path: whole string is JSON
     if t.startswith("{") or t.startswith("["):
         try:
-            json.loads(t)
+            orjson.loads(t)
             return t
         except Exception:
             pass
 
-    # Find first '{' or '[' and try to decode from there
-    starts: List[int] = []
-    brace = t.find("{")
-    brack = t.find("[")
-    if brace != -1:
-        starts.append(brace)
-    if brack != -1:
-        starts.append(brack)
-    if not starts:
+    # Try the earlier of the first '{' / '[' first, then the other one
+    first = t.find("{")
+    second = t.find("[")
+    if first == -1 and second == -1:
         return None
+    if first == -1 or (second != -1 and second < first):
+        first, second = second, first
 
-    for start in sorted(starts):
+    for start in (first, second):
+        if start == -1:
+            break
         snippet = t[start:]
         try:
-            json.JSONDecoder().raw_decode(snippet)
-            obj, end = json.JSONDecoder().raw_decode(snippet)
-            # end is index into snippet
-            candidate = snippet[:end].strip()
-            # sanity check
-            json.loads(candidate)
-            return candidate
-        except Exception:
+            _obj, end = _DECODER.raw_decode(snippet)
+            # end is index into snippet; raw_decode already validated it
+            return snippet[:end]
+        except ValueError:
             continue
 
     return None
 
 
-def repair_json(raw_output: str) -> Tuple[Optional[Any], Optional[str]]:
-    repair_prompt = (
-        "Fix the following to valid JSON only. Do not add commentary.\n"
-        "Return ONLY the JSON.\n"
-        f"Raw output:\n{raw_output}\n"
-    )
-    model = os.getenv("OLLAMA_MODEL", "qwen2.5:7b-instruct")
-    payload = {
-        "model": model,
-        "prompt": repair_prompt,
-        "stream": False,
-    }
-    try:
-        response = requests.post("http://localhost:11434/api/generate", json=payload, timeout=30)
-        response.raise_for_status()
-        text = response.json().get("response", "")
-        extracted = _extract_first_json(text)
-        if extracted is None:
-            # last resort: try the stripped whole thing
-            return json.loads(_strip_code_fences(text)), None
-        return json.loads(extracted), None
-    except Exception as exc:
-        return None, str(exc)
-
-
 def normalize_ollama_candidates(obj: object) -> List[Dict[str, Any]]:
     if isinstance(obj, dict):
         candidates = obj.get("candidates")
@@ -311,95 +448,196 @@ def normalize_ollama_candidates(obj: object) -> List[Dict[str, Any]]:
     return []
 
 
+def jsonify(value: Any) -> Any:
+    """Coerce a parsed structure to JSON-safe values in one walk (unknown types become str)."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): jsonify(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonify(v) for v in value]
+    return str(value)
+
+
+# Every setting that changes what call_ollama sends or how it decodes; a result produced
+# under different values must not be served back.
+_RESULT_CACHE_SETTINGS = (
+    "OLLAMA_MODEL",
+    "OLLAMA_TEMPERATURE",
+    "OLLAMA_NUM_PREDICT",
+    "OLLAMA_NUM_CTX",
+    "OLLAMA_MAX_INPUT_JSON_CHARS",
+    "OLLAMA_MAX_TOTAL_PROMPT_CHARS",
+)
+_RESULT_CACHE_LOCK = threading.Lock()
+
+
+def _result_cache_path() -> Optional[str]:
+    if os.getenv("OLLAMA_CACHE", "true").lower() != "true":
+        return None
+    return os.getenv("OLLAMA_CACHE_PATH") or os.path.join(tempfile.gettempdir(), "travelapp_ollama_cache.sqlite3")
+
+
+def _result_cache_key(prompt: str, filtered: List[Dict[str, Any]]) -> str:
+    settings = orjson.dumps({name: os.getenv(name) for name in _RESULT_CACHE_SETTINGS})
+    body = orjson.dumps(filtered, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(settings)
+    digest.update(b"\0")
+    digest.update(prompt.encode())
+    digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=4)
+def _result_cache_connect(path: str) -> sqlite3.Connection:
+    # One connection per path for the life of the process; callers hold _RESULT_CACHE_LOCK
+    conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS ollama_results (key TEXT PRIMARY KEY, value BLOB NOT NULL, ts INTEGER NOT NULL)"
+    )
+    conn.commit()
+    return conn
+
+
+def _result_cache_ttl() -> int:
+    return int(os.getenv("OLLAMA_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+
+def _result_cache_get(path: str, key: str) -> Optional[OllamaResult]:
+    try:
+        with _RESULT_CACHE_LOCK:
+            conn = _result_cache_connect(path)
+            row = conn.execute("SELECT value, ts FROM ollama_results WHERE key = ?", (key,)).fetchone()
+    except Exception as exc:
+        print("[worker] ollama cache read failed", repr(exc), flush=True)
+        return None
+    if not row or time.time() - row[1] > _result_cache_ttl():
+        return None
+    return OllamaResult(**orjson.loads(row[0]))
+
+
+def _result_cache_put(path: str, key: str, result: OllamaResult) -> None:
+    now = int(time.time())
+    try:
+        with _RESULT_CACHE_LOCK:
+            conn = _result_cache_connect(path)
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ollama_results (key, value, ts) VALUES (?, ?, ?)",
+                    (key, orjson.dumps(asdict(result), default=str), now),
+                )
+                # Prune on write so the file stays bounded without a separate sweeper
+                conn.execute("DELETE FROM ollama_results WHERE ts < ?", (now - _result_cache_ttl(),))
+                conn.execute(
+                    "DELETE FROM ollama_results WHERE key NOT IN "
+                    "(SELECT key FROM ollama_results ORDER BY ts DESC LIMIT ?)",
+                    (int(os.getenv("OLLAMA_CACHE_MAX_ROWS", "5000")),),
+                )
+    except Exception as exc:
+        print("[worker] ollama cache write failed", repr(exc), flush=True)
+
+
+def _fail(
+    prompt: str,
+    input_payload: Dict[str, Any],
+    output_raw: str,
+    error: Optional[str],
+    fallback_reason: str,
+    segment_count: int,
+    *,
+    output_json: Optional[Dict[str, Any]] = None,
+    used: bool = True,
+) -> OllamaResult:
+    """Build the no-candidates OllamaResult shared by every fallback path."""
+    return OllamaResult(
+        candidates=None,
+        prompt=prompt,
+        input_payload=input_payload,
+        output_raw=output_raw,
+        output_json=output_json,
+        error=error,
+        used=used,
+        fallback_reason=fallback_reason,
+        segment_count=segment_count,
+    )
+
+
 def extract_with_ollama(
     transcript_segments: List[Dict[str, Any]],
     location_hint: Optional[str],
 ) -> OllamaResult:
     use_ollama = os.getenv("USE_OLLAMA", "false").lower() == "true"
     if not use_ollama:
-        return OllamaResult(
-            candidates=None,
-            prompt="",
-            input_payload={},
-            output_raw="",
-            output_json=None,
-            error=None,
-            used=False,
-            fallback_reason="USE_OLLAMA=false",
-            segment_count=0,
-        )
-
-    filtered = filter_segments(transcript_segments)
+        return _fail("", {}, "", None, "USE_OLLAMA=false", 0, used=False)
+
+    # Prefill time scales with input tokens, so budget by (estimated) tokens. The serialized
+    # input must also fit call_ollama's OLLAMA_MAX_INPUT_JSON_CHARS, or it gets cut mid-JSON.
+    token_budget = int(os.getenv("OLLAMA_TOKEN_BUDGET", "6000"))
+    envelope = {"video_id": None, "location_hint": location_hint, "transcript": []}
+    max_chars = int(os.getenv("OLLAMA_MAX_INPUT_JSON_CHARS", "20000")) - len(
+        orjson.dumps(envelope, default=str, option=orjson.OPT_NON_STR_KEYS)
+    )
+    filtered = pack_segments(
+        filter_segments(_drop_low_value_segments(transcript_segments)), token_budget, max_chars
+    )
     prompt = build_prompt(location_hint)
+    if not filtered:
+        # Nothing place-like survived the pre-filter; the heuristic fallback covers it
+        return _fail(prompt, {}, "", None, "no_relevant_segments", 0, used=False)
     input_payload = {
         "video_id": None,
         "location_hint": location_hint,
         "transcript": filtered,
     }
 
+    # Reprocessing the same transcript (retries, reruns) is served from disk
+    cache_path = _result_cache_path()
+    cache_key = ""
+    if cache_path:
+        cache_key = _result_cache_key(prompt, filtered)
+        cached = _result_cache_get(cache_path, cache_key)
+        if cached is not None:
+            return cached
+
     output_raw, error = call_ollama(prompt, input_payload)
     if error:
-        return OllamaResult(
-            candidates=None,
-            prompt=prompt,
-            input_payload=input_payload,
-            output_raw=output_raw,
-            output_json=None,
-            error=error,
-            used=True,
-            fallback_reason="ollama_call_failed",
-            segment_count=len(filtered),
-        )
+        return _fail(prompt, input_payload, output_raw, error, "ollama_call_failed", len(filtered))
 
     parsed: Optional[Any] = None
 
-    # 1) Try direct JSON parse
+    # format=json makes the output parseable; only salvage locally if a model ignores it
     try:
-        parsed = json.loads(output_raw)
+        parsed = orjson.loads(output_raw)
     except Exception:
-        # 2) Try extracting JSON substring from messy output
         extracted = _extract_first_json(output_raw)
         if extracted is not None:
             try:
-                parsed = json.loads(extracted)
+                parsed = orjson.loads(extracted)
             except Exception:
                 parsed = None
 
-    # 3) If still not parseable, ask Ollama to repair
     if parsed is None:
-        parsed, repair_error = repair_json(output_raw)
-        if parsed is None:
-            return OllamaResult(
-                candidates=None,
-                prompt=prompt,
-                input_payload=input_payload,
-                output_raw=output_raw,
-                output_json=None,
-                error=repair_error or "json_parse_failed",
-                used=True,
-                fallback_reason="ollama_json_parse_failed",
-                segment_count=len(filtered),
-            )
+        return _fail(prompt, input_payload, output_raw, "json_parse_failed", "ollama_json_parse_failed", len(filtered))
 
     candidates = normalize_ollama_candidates(parsed)
     if not candidates:
-        return OllamaResult(
-            candidates=None,
-            prompt=prompt,
-            input_payload=input_payload,
-            output_raw=output_raw,
+        return _fail(
+            prompt,
+            input_payload,
+            output_raw,
+            None,
+            "ollama_empty_candidates",
+            len(filtered),
             output_json={"candidates": []},
-            error=None,
-            used=True,
-            fallback_reason="ollama_empty_candidates",
-            segment_count=len(filtered),
         )
 
     # Make JSON-safe to avoid circular ref / non-serializable surprises
-    safe_candidates = json.loads(json.dumps(candidates, default=str))
+    safe_candidates = jsonify(candidates)
     safe_output_json = {"candidates": safe_candidates}
 
-    return OllamaResult(
+    result = OllamaResult(
         candidates=safe_candidates,
         prompt=prompt,
         input_payload=input_payload,
@@ -410,3 +648,6 @@ def extract_with_ollama(
         fallback_reason=None,
         segment_count=len(filtered),
     )
+    if cache_path:
+        _result_cache_put(cache_path, cache_key, result)
+    return result
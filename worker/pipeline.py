@@ -1,24 +1,36 @@
+import functools
+import heapq
 import json
+import multiprocessing
 import os
 import re
+import string
 import subprocess
-import tempfile
-from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-import requests
-from faster_whisper import WhisperModel
-from paddleocr import PaddleOCR
+import ahocorasick
+import numpy as np
 
-from ollama_extractor import extract_with_ollama
+if TYPE_CHECKING:
+    # Imported lazily below: these pull in hundreds of MB of native libs,
+    # which heuristic-only callers (and the tests) never need
+    from faster_whisper import WhisperModel
+    from paddleocr import PaddleOCR
+
+from ollama_extractor import extract_with_ollama, jsonify
 from places_enricher import enrich_candidates_with_places
 
 
-def extract_audio(video_path: str) -> str:
-    audio_path = Path(tempfile.mkdtemp(prefix='video_audio_')) / 'audio.wav'
+def extract_audio(video_path: str) -> np.ndarray:
+    # Decode straight to 16 kHz mono PCM on stdout instead of writing a temp WAV
     cmd = [
         'ffmpeg',
-        '-y',
+        '-loglevel',
+        'error',
         '-i',
         video_path,
         '-vn',
@@ -26,78 +38,268 @@ def extract_audio(video_path: str) -> str:
         '1',
         '-ar',
         '16000',
-        str(audio_path),
+        '-f',
+        's16le',
+        '-',
     ]
-    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    return str(audio_path)
+    proc = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    return np.frombuffer(proc.stdout, np.int16).astype(np.float32) / 32768.0
 
 
-def transcribe(audio_path: str) -> List[Dict[str, int | str]]:
-    model_name = os.getenv('WHISPER_MODEL', 'base')
-    model = WhisperModel(model_name, compute_type='int8')
-    segments, _info = model.transcribe(audio_path, beam_size=5, vad_filter=True)
-    results: List[Dict[str, int | str]] = []
-    for segment in segments:
-        results.append(
-            {
-                'start_ms': int(segment.start * 1000),
-                'end_ms': int(segment.end * 1000),
-                'text': segment.text.strip(),
-            }
+_MODEL_LOCK = threading.Lock()
+
+
+def _branch_threads() -> int:
+    """
+    Default thread count for one pipeline branch: this process's share of the cores
+    (WORKER_CONCURRENCY workers may share the machine), halved because run_pipeline
+    runs Whisper and OCR at the same time.
+    """
+    workers = max(1, int(os.getenv('WORKER_CONCURRENCY', '1')))
+    return max(1, (os.cpu_count() or 2) // workers // 2)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_whisper(model_name: str, compute_type: str, device: str, cpu_threads: int) -> 'WhisperModel':
+    from faster_whisper import WhisperModel
+
+    # Loading weights takes seconds; keep one instance per config for the life of the worker
+    return WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def transcribe(audio: Union[str, np.ndarray]) -> List[Dict[str, int | str]]:
+    with _MODEL_LOCK:
+        model = _get_whisper(
+            os.getenv('WHISPER_MODEL', 'base'),
+            os.getenv('WHISPER_COMPUTE_TYPE', 'int8'),
+            os.getenv('WHISPER_DEVICE', 'cpu'),
+            # CTranslate2 otherwise caps itself at 4 intra-op threads
+            int(os.getenv('WHISPER_THREADS') or _branch_threads()),
         )
-    return results
+    segments, _info = model.transcribe(audio, beam_size=5, vad_filter=True)
+    segments = list(segments)
+    # Convert all timestamps in one vectorized pass; float64 keeps the truncation identical
+    # to int(seconds * 1000), and tolist() hands back plain ints that stay JSON-serializable
+    count = len(segments)
+    starts_ms = (np.fromiter((s.start for s in segments), np.float64, count) * 1000).astype(np.int64).tolist()
+    ends_ms = (np.fromiter((s.end for s in segments), np.float64, count) * 1000).astype(np.int64).tolist()
+    return [
+        {'start_ms': start_ms, 'end_ms': end_ms, 'text': segment.text.strip()}
+        for start_ms, end_ms, segment in zip(starts_ms, ends_ms, segments)
+    ]
+
+
+FRAME_WIDTH = 640
+# Frames per second sampled for OCR; frame timestamps are derived from the frame counter
+FRAME_SAMPLE_FPS = 1
 
 
-def sample_frames(video_path: str) -> List[Dict[str, int | str]]:
-    frames_dir = Path(tempfile.mkdtemp(prefix='video_frames_'))
-    output_pattern = str(frames_dir / 'frame_%06d.jpg')
+def _probe_frame_size(video_path: str) -> Tuple[int, int]:
+    cmd = [
+        'ffprobe',
+        '-v',
+        'error',
+        '-select_streams',
+        'v:0',
+        '-show_entries',
+        'stream=width,height:stream_side_data=rotation',
+        '-of',
+        'json',
+        video_path,
+    ]
+    proc = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    stream = json.loads(proc.stdout)['streams'][0]
+    width, height = int(stream['width']), int(stream['height'])
+    rotation = next(
+        (int(data['rotation']) for data in stream.get('side_data_list', []) if 'rotation' in data),
+        0,
+    )
+    # ffmpeg auto-rotates on decode, so portrait phone videos come out transposed
+    if abs(rotation) % 180 == 90:
+        width, height = height, width
+    return width, height
+
+
+def sample_frames(video_path: str) -> Iterator[Dict[str, object]]:
+    """
+    Decode one frame per second as raw BGR straight off ffmpeg's stdout (no JPEGs on disk).
+    Yields {'timestamp_ms', 'image'} as frames arrive so OCR can start before decoding ends.
+    """
+    src_width, src_height = _probe_frame_size(video_path)
+    width = max(2, min(FRAME_WIDTH, src_width) // 2 * 2)
+    height = max(2, round(src_height * width / src_width / 2) * 2)
     cmd = [
         'ffmpeg',
-        '-y',
+        '-loglevel',
+        'error',
         '-i',
         video_path,
         '-vf',
-        'fps=1',
-        '-q:v',
-        '2',
-        output_pattern,
+        f'fps={FRAME_SAMPLE_FPS},scale={width}:{height}',
+        '-f',
+        'rawvideo',
+        '-pix_fmt',
+        'bgr24',
+        '-',
     ]
-    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    frames = sorted(frames_dir.glob('frame_*.jpg'))
-    results: List[Dict[str, int | str]] = []
-    for frame in frames:
-        match = re.search(r'frame_(\d+)\.jpg', frame.name)
-        if not match:
-            continue
-        index = int(match.group(1))
-        timestamp_ms = max(index - 1, 0) * 1000
-        results.append({'timestamp_ms': timestamp_ms, 'frame_path': str(frame)})
-    return results
+    frame_bytes = width * height * 3
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=1 << 20)
+    try:
+        index = 0
+        while True:
+            buffer = bytearray(frame_bytes)
+            if proc.stdout.readinto(buffer) < frame_bytes:
+                break
+            image = np.frombuffer(buffer, np.uint8).reshape(height, width, 3)
+            yield {'timestamp_ms': index * 1000 // FRAME_SAMPLE_FPS, 'image': image}
+            index += 1
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+_OCR_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=4)
+def _get_ocr(lang: str, onnx_dir: Optional[str], cpu_threads: int) -> 'PaddleOCR':
+    from paddleocr import PaddleOCR
+
+    # rec/cls batch of 1 shrinks Paddle's CPU arena a lot with no throughput loss,
+    # since the CPU predictor runs the batch sequentially anyway
+    options: Dict[str, object] = {
+        'use_angle_cls': True,
+        'lang': lang,
+        'rec_batch_num': 1,
+        'cls_batch_num': 1,
+        'enable_mkldnn': True,
+        'cpu_threads': cpu_threads,
+    }
+    if onnx_dir:
+        # INT8-quantized det/rec/cls models run through onnxruntime (see README)
+        options.update(
+            use_onnx=True,
+            det_model_dir=os.path.join(onnx_dir, 'det.onnx'),
+            rec_model_dir=os.path.join(onnx_dir, 'rec.onnx'),
+            cls_model_dir=os.path.join(onnx_dir, 'cls.onnx'),
+        )
+    return PaddleOCR(**options)
+
 
+def _ocr_frame(ocr: 'PaddleOCR', frame: Dict[str, object]) -> Optional[Dict[str, int | str]]:
+    image = frame['image']
+    try:
+        ocr_result = ocr.ocr(image, cls=True)
+    except TypeError:
+        ocr_result = ocr.ocr(image)
+    lines: List[str] = []
+    for entry in ocr_result or ():
+        # PaddleOCR yields None instead of [] for a frame with no text
+        for line in entry or ():
+            if len(line) < 2:
+                continue
+            text = line[1][0]
+            if text:
+                lines.append(text.strip())
+    if not lines:
+        return None
+    return {'timestamp_ms': int(frame['timestamp_ms']), 'text': ' | '.join(lines)}
 
-def ocr_frames(frames: Iterable[Dict[str, int | str]]) -> List[Dict[str, int | str]]:
-    ocr = PaddleOCR(use_angle_cls=True, lang=os.getenv('OCR_LANG', 'en'))
+
+_POOL_OCR: Optional['PaddleOCR'] = None
+
+
+def _init_ocr_process(lang: str, onnx_dir: Optional[str], cpu_threads: int) -> None:
+    global _POOL_OCR
+    _POOL_OCR = _get_ocr(lang, onnx_dir, cpu_threads)
+
+
+def _ocr_frame_in_process(frame: Dict[str, object]) -> Optional[Dict[str, int | str]]:
+    return _ocr_frame(_POOL_OCR, frame)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_ocr_pool(processes: int, lang: str, onnx_dir: Optional[str]) -> ProcessPoolExecutor:
+    # Kept for the life of the worker so each child loads its OCR model once, not per job.
+    # spawn, not fork: the caller runs next to the transcription thread.
+    # An executor rather than multiprocessing.Pool: Pool silently replaces a child that dies
+    # (Paddle segfault, OOM kill) and its result never resolves, hanging the job forever.
+    # The executor raises BrokenProcessPool instead, which fails the job normally.
+    cpu_threads = max(1, _branch_threads() // processes)
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_ocr_process,
+        initargs=(lang, onnx_dir, cpu_threads),
+    )
+
+
+def ocr_frames(frames: Iterable[Dict[str, object]]) -> List[Dict[str, int | str]]:
+    lang = os.getenv('OCR_LANG', 'en')
+    onnx_dir = os.getenv('OCR_ONNX_DIR') or None
+    processes = int(os.getenv('OCR_PROCESSES', '1'))
     results: List[Dict[str, int | str]] = []
-    for frame in frames:
-        frame_path = str(frame['frame_path'])
-        timestamp_ms = int(frame['timestamp_ms'])
-        try:
-            ocr_result = ocr.ocr(frame_path, cls=True)
-        except TypeError:
-            ocr_result = ocr.ocr(frame_path)
-        lines: List[str] = []
-        for entry in ocr_result:
-            for line in entry:
-                if len(line) < 2:
-                    continue
-                text = line[1][0]
-                if text:
-                    lines.append(text.strip())
-        if lines:
-            results.append({'timestamp_ms': timestamp_ms, 'text': ' | '.join(lines)})
+
+    if processes <= 1:
+        with _OCR_LOCK:
+            ocr = _get_ocr(lang, onnx_dir, _branch_threads())
+        for frame in frames:
+            line = _ocr_frame(ocr, frame)
+            if line:
+                results.append(line)
+        return results
+
+    # Frames are independent, so fan them out across processes. Only a bounded number
+    # are in flight at once; sample_frames is lazy and a long video would not fit in RAM.
+    with _OCR_LOCK:
+        pool = _get_ocr_pool(processes, lang, onnx_dir)
+    pending: Deque[Future] = deque()
+    try:
+        for frame in frames:
+            pending.append(pool.submit(_ocr_frame_in_process, frame))
+            if len(pending) >= processes * 2:
+                line = pending.popleft().result()
+                if line:
+                    results.append(line)
+        while pending:
+            line = pending.popleft().result()
+            if line:
+                results.append(line)
+    except BrokenProcessPool:
+        # A broken executor rejects all further work; drop it so the next job gets a fresh one
+        with _OCR_LOCK:
+            _get_ocr_pool.cache_clear()
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
     return results
 
 
+def warm_up_models() -> None:
+    """Load Whisper and OCR (and run each once) so the first job does not pay the cold start."""
+    transcribe(np.zeros(1600, dtype=np.float32))
+    # The OCR executor starts a child per submission only as needed, so send one blank
+    # frame per child; each loads its model in the initializer before taking work.
+    processes = max(1, int(os.getenv('OCR_PROCESSES', '1')))
+    blank = np.zeros((32, 32, 3), dtype=np.uint8)
+    ocr_frames([{'timestamp_ms': 0, 'image': blank} for _ in range(processes)])
+
+
+def run_pipeline(video_path: str) -> Tuple[List[Dict[str, int | str]], List[Dict[str, int | str]]]:
+    """
+    Run the audio (ffmpeg -> whisper) and frame (ffmpeg -> OCR) branches concurrently.
+    They share no data, so wall time is the slower branch instead of the sum.
+    Returns (transcript_segments, ocr_lines).
+    """
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix='pipeline') as pool:
+        audio_future = pool.submit(lambda: transcribe(extract_audio(video_path)))
+        ocr_future = pool.submit(lambda: ocr_frames(sample_frames(video_path)))
+        return audio_future.result(), ocr_future.result()
+
+
 PLACE_KEYWORDS = [
     'cafe', 'coffee', 'ramen', 'restaurant', 'bar', 'bistro', 'diner', 'grill', 'market',
     'bakery', 'pizza', 'taco', 'sushi', 'bbq', 'pub', 'tavern', 'tea', 'noodle', 'burger',
@@ -109,9 +311,43 @@ GENERIC_WORDS = {
 }
 
 
+# One O(len(text)) automaton pass instead of a substring scan per keyword
+_PLACE_KEYWORD_AC = ahocorasick.Automaton()
+for _keyword in PLACE_KEYWORDS:
+    _PLACE_KEYWORD_AC.add_word(_keyword, _keyword)
+_PLACE_KEYWORD_AC.make_automaton()
+# Names reaching looks_like_place_name are already ASCII-normalized
+_STRIP_UPPER = str.maketrans('', '', string.ascii_uppercase)
+
+_NON_NAME_CHARS_RE = re.compile(r'[^A-Za-z0-9\s&@\-\'\.]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_MENTION_NAME = r"([A-Za-z0-9&@\-\'\.\s]+)"
+_MENTION_PHRASES = [
+    r"we(?:'re| are) at ",
+    r"we(?:'re| are) in ",
+    r"go to ",
+    r"going to ",
+    r"next stop is ",
+    r"this is ",
+]
+# All phrases in one scan. The lookahead lets overlapping mentions through
+# (e.g. the "this is Y" inside "we're at X this is Y"), exactly like separate passes did.
+# Every phrase contains one of these; most segments contain none and skip the regex
+_MENTION_ANCHORS = ('we', 'go', 'next stop is', 'this is')
+_MENTION_RE = re.compile(
+    '(?=' + '|'.join(phrase + _MENTION_NAME for phrase in _MENTION_PHRASES) + ')',
+    re.IGNORECASE,
+)
+
+
+def has_place_keyword(lowered: str) -> bool:
+    return next(_PLACE_KEYWORD_AC.iter(lowered), None) is not None
+
+
 def normalize_text(text: str) -> str:
-    cleaned = re.sub(r'[^A-Za-z0-9\s&@\-\'\.]', ' ', text)
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    cleaned = _NON_NAME_CHARS_RE.sub(' ', text)
+    cleaned = _WHITESPACE_RE.sub(' ', cleaned).strip()
     return cleaned
 
 
@@ -121,9 +357,9 @@ def looks_like_place_name(text: str) -> bool:
     lowered = text.lower()
     if lowered in GENERIC_WORDS:
         return False
-    if any(keyword in lowered for keyword in PLACE_KEYWORDS):
+    if has_place_keyword(lowered):
         return True
-    if sum(1 for c in text if c.isupper()) >= 2:
+    if len(text) - len(text.translate(_STRIP_UPPER)) >= 2:
         return True
     if text.istitle():
         return True
@@ -131,20 +367,26 @@ def looks_like_place_name(text: str) -> bool:
 
 
 def extract_place_mentions(text: str) -> List[str]:
-    patterns = [
-        r"we(?:'re| are) at ([A-Za-z0-9&@\-\'\.\s]+)",
-        r"we(?:'re| are) in ([A-Za-z0-9&@\-\'\.\s]+)",
-        r"go to ([A-Za-z0-9&@\-\'\.\s]+)",
-        r"going to ([A-Za-z0-9&@\-\'\.\s]+)",
-        r"next stop is ([A-Za-z0-9&@\-\'\.\s]+)",
-        r"this is ([A-Za-z0-9&@\-\'\.\s]+)",
-    ]
+    # Per phrase, skip matches that start inside that phrase's previous match
+    # (what a separate findall would do), then report grouped in phrase order.
+    lowered = text.lower()
+    if not any(anchor in lowered for anchor in _MENTION_ANCHORS):
+        return []
+    found: List[Tuple[int, int, str]] = []
+    last_end = [0] * len(_MENTION_PHRASES)
+    for match in _MENTION_RE.finditer(text):
+        group = match.lastindex
+        slot = group - 1
+        if match.start() < last_end[slot]:
+            continue
+        last_end[slot] = match.end(group)
+        found.append((slot, match.start(), match.group(group)))
+    found.sort()
     mentions: List[str] = []
-    for pattern in patterns:
-        for match in re.findall(pattern, text, flags=re.IGNORECASE):
-            candidate = normalize_text(match)
-            if candidate:
-                mentions.append(candidate)
+    for _slot, _start, raw in found:
+        candidate = normalize_text(raw)
+        if candidate:
+            mentions.append(candidate)
     return mentions
 
 
@@ -158,7 +400,7 @@ def score_candidate(name: str, evidence: Dict[str, List[Dict[str, int | str]]])
     if evidence.get('transcript_snippets'):
         score += 0.3
         breakdown['transcript'] = 0.3
-    if any(keyword in lowered for keyword in PLACE_KEYWORDS):
+    if has_place_keyword(lowered):
         score += 0.1
         breakdown['keyword'] = 0.1
     if lowered in GENERIC_WORDS:
@@ -180,16 +422,16 @@ def build_candidates(
         text = normalize_text(str(segment['text']))
         for mention in extract_place_mentions(text):
             key = mention.lower()
-            entry = candidates.setdefault(
-                key,
-                {
+            # Only build the entry literal on first sight (setdefault built it every time)
+            entry = candidates.get(key)
+            if entry is None:
+                entry = candidates[key] = {
                     'name': mention,
                     'transcript_snippets': [],
                     'ocr_snippets': [],
                     'start_ms': segment['start_ms'],
                     'end_ms': segment['end_ms'],
-                },
-            )
+                }
             entry['transcript_snippets'].append(
                 {'text': segment['text'], 'start_ms': segment['start_ms'], 'end_ms': segment['end_ms']}
             )
@@ -199,35 +441,34 @@ def build_candidates(
         if not looks_like_place_name(text):
             continue
         key = text.lower()
-        entry = candidates.setdefault(
-            key,
-            {
+        entry = candidates.get(key)
+        if entry is None:
+            entry = candidates[key] = {
                 'name': text,
                 'transcript_snippets': [],
                 'ocr_snippets': [],
                 'start_ms': line['timestamp_ms'],
                 'end_ms': line['timestamp_ms'],
-            },
-        )
+            }
         entry['ocr_snippets'].append({'text': line['text'], 'timestamp_ms': line['timestamp_ms']})
 
+    address_hint = location_hint.strip() if location_hint else None
     enriched: List[Dict[str, object]] = []
-    for _key, entry in candidates.items():
+    for entry in candidates.values():
         name = str(entry['name'])
         evidence = {
-            'transcript_snippets': entry.get('transcript_snippets', []),
-            'ocr_snippets': entry.get('ocr_snippets', []),
+            'transcript_snippets': entry['transcript_snippets'],
+            'ocr_snippets': entry['ocr_snippets'],
         }
         confidence, breakdown = score_candidate(name, evidence)
         evidence['score_breakdown'] = breakdown
-        address_hint = location_hint.strip() if location_hint else None
         enriched.append(
             {
                 'name': name,
                 'address_hint': address_hint,
                 'confidence': confidence,
-                'start_ms': entry.get('start_ms'),
-                'end_ms': entry.get('end_ms'),
+                'start_ms': entry['start_ms'],
+                'end_ms': entry['end_ms'],
                 'source': evidence,
                 'extraction_method': 'heuristic',
                 'llm_prompt': None,
@@ -235,8 +476,7 @@ def build_candidates(
             }
         )
 
-    enriched.sort(key=lambda item: float(item['confidence']), reverse=True)
-    return enriched[:15]
+    return heapq.nlargest(15, enriched, key=lambda item: float(item['confidence']))
 
 
 def build_pipeline_candidates(
@@ -244,17 +484,6 @@ def build_pipeline_candidates(
 	ocr_lines: List[Dict[str, int | str]],
 	location_hint: Optional[str],
 ) -> Tuple[List[Dict[str, object]], Dict[str, object]]:
-	def json_safe(obj: object) -> object:
-		try:
-			json.dumps(obj)
-			return obj
-		except Exception:
-			if isinstance(obj, dict):
-				return {str(key): json_safe(value) for key, value in obj.items()}
-			if isinstance(obj, list):
-				return [json_safe(item) for item in obj]
-			return str(obj)
-
 	ollama_result = extract_with_ollama(transcript_segments, location_hint)
 	if ollama_result.used and ollama_result.candidates:
 		hydrated: List[Dict[str, object]] = []
@@ -268,9 +497,9 @@ def build_pipeline_candidates(
 		enriched = enrich_candidates_with_places(hydrated, location_hint)
 		return enriched, {
 			'ollama_prompt': ollama_result.prompt,
-			'ollama_input': json_safe(ollama_result.input_payload),
+			'ollama_input': jsonify(ollama_result.input_payload),
 			'ollama_output_raw': ollama_result.output_raw,
-			'ollama_output_json': json_safe(ollama_result.output_json),
+			'ollama_output_json': jsonify(ollama_result.output_json),
 			'ollama_error': ollama_result.error,
 			'ollama_used': ollama_result.used,
 			'ollama_fallback_reason': ollama_result.fallback_reason,
@@ -281,9 +510,9 @@ def build_pipeline_candidates(
 	enriched = enrich_candidates_with_places(candidates, location_hint)
 	return enriched, {
 		'ollama_prompt': ollama_result.prompt,
-		'ollama_input': json_safe(ollama_result.input_payload),
+		'ollama_input': jsonify(ollama_result.input_payload),
 		'ollama_output_raw': ollama_result.output_raw,
-		'ollama_output_json': json_safe(ollama_result.output_json),
+		'ollama_output_json': jsonify(ollama_result.output_json),
 		'ollama_error': ollama_result.error,
 		'ollama_used': ollama_result.used,
 		'ollama_fallback_reason': ollama_result.fallback_reason or 'heuristic_fallback',
@@ -1,9 +1,77 @@
+import json
+import logging
 import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+log = logging.getLogger('worker.places')
 
 PLACE_BIAS_RADIUS_METERS = 50000
+# Google statuses that are a real answer for the query (errors/quota are never cached)
+_CACHEABLE_STATUSES = ('OK', 'ZERO_RESULTS')
+
+# Keep-alive session so repeat Google calls skip the TCP+TLS handshake; transient
+# 5xx / rate-limit responses are retried with backoff before we see them
+_RETRY = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=_RETRY))
+
+_cache_conn: Optional[sqlite3.Connection] = None
+_cache_lock = threading.Lock()
+_MISS = object()
+
+
+def _get_cache() -> Optional[sqlite3.Connection]:
+    global _cache_conn
+    if os.getenv('PLACES_CACHE', 'true').lower() != 'true':
+        return None
+    if _cache_conn is None:
+        path = os.getenv('PLACES_CACHE_PATH') or os.path.join(tempfile.gettempdir(), 'travelapp_places_cache.sqlite3')
+        conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS places_cache (key TEXT PRIMARY KEY, value BLOB, ts INTEGER NOT NULL)')
+        conn.commit()
+        _cache_conn = conn
+    return _cache_conn
+
+
+def _cache_get(key: str) -> Any:
+    try:
+        with _cache_lock:
+            conn = _get_cache()
+            if conn is None:
+                return _MISS
+            row = conn.execute('SELECT value, ts FROM places_cache WHERE key = ?', (key,)).fetchone()
+    except Exception as e:
+        log.warning('places cache read failed %s', {'key': key, 'error': repr(e)})
+        return _MISS
+    ttl_seconds = int(os.getenv('PLACES_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+    if not row or time.time() - row[1] > ttl_seconds:
+        return _MISS
+    return json.loads(row[0])
+
+
+def _cache_put(key: str, value: Any) -> None:
+    try:
+        with _cache_lock:
+            conn = _get_cache()
+            if conn is None:
+                return
+            conn.execute(
+                'INSERT OR REPLACE INTO places_cache (key, value, ts) VALUES (?, ?, ?)',
+                (key, json.dumps(value), int(time.time())),
+            )
+            conn.commit()
+    except Exception as e:
+        log.warning('places cache write failed %s', {'key': key, 'error': repr(e)})
 
 
 def _get_api_key() -> str:
@@ -18,9 +86,14 @@ def _get_api_key() -> str:
 def geocode_location_hint(location_hint: str) -> Optional[Tuple[float, float]]:
     api_key = _get_api_key()
     if not api_key:
-        print("[worker] geocode missing api key", flush=True)
+        log.warning("geocode missing api key")
         return None
 
+    cache_key = f"geocode|{location_hint}"
+    cached = _cache_get(cache_key)
+    if cached is not _MISS:
+        return tuple(cached) if cached else None
+
     url = "https://maps.googleapis.com/maps/api/geocode/json"
     params = {
         "address": location_hint,
@@ -28,35 +101,44 @@ def geocode_location_hint(location_hint: str) -> Optional[Tuple[float, float]]:
     }
 
     try:
-        response = requests.get(url, params=params, timeout=20)
+        response = _SESSION.get(url, params=params, timeout=(5, 20))
         data = response.json()
     except Exception as e:
-        print("[worker] geocode request failed", {
+        log.warning("geocode request failed %s", {
             "address": location_hint,
             "error": repr(e),
-        }, flush=True)
+        })
         return None
 
     # 🔍 CRITICAL: log Google’s own status
-    print("[worker] geocode http", {
+    log.info("geocode http %s", {
         "address": location_hint,
         "status_code": response.status_code,
         "status": data.get("status"),
         "error_message": data.get("error_message"),
         "results_len": len(data.get("results") or []),
-    }, flush=True)
+    })
 
     # HTTP-level failure
     try:
         response.raise_for_status()
     except Exception as e:
-        print("[worker] geocode http error", {
+        log.warning("geocode http error %s", {
             "address": location_hint,
             "error": repr(e),
-        }, flush=True)
+        })
         return None
 
     # Google-level failure
+    if data.get("status") not in _CACHEABLE_STATUSES:
+        return None
+
+    coords = _geocode_coords(data)
+    _cache_put(cache_key, coords)
+    return coords
+
+
+def _geocode_coords(data: Dict[str, Any]) -> Optional[Tuple[float, float]]:
     if data.get("status") != "OK":
         return None
 
@@ -83,27 +165,49 @@ def places_text_search(query: str, location_bias: Optional[Tuple[float, float]])
     if not api_key:
         return None
 
+    cache_key = f"places|{query}|{location_bias}"
+    cached = _cache_get(cache_key)
+    if cached is not _MISS:
+        return cached
+
     url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
     params = {"query": query, "key": api_key}
     if location_bias:
         params["location"] = f"{location_bias[0]},{location_bias[1]}"
         params["radius"] = str(PLACE_BIAS_RADIUS_METERS)
 
-    response = requests.get(url, params=params, timeout=20)
+    response = _SESSION.get(url, params=params, timeout=(5, 20))
     data = response.json()
 
     # 🔥 add this
-    print("[worker] places http", {
-        "query": query,
-        "status_code": response.status_code,
-        "status": data.get("status"),
-        "error_message": data.get("error_message"),
-        "results_len": len(data.get("results") or []),
-        "used_bias": bool(location_bias),
-    }, flush=True)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("places http %s", {
+            "query": query,
+            "status_code": response.status_code,
+            "status": data.get("status"),
+            "error_message": data.get("error_message"),
+            "results_len": len(data.get("results") or []),
+            "used_bias": bool(location_bias),
+        })
+    elif data.get("status") not in _CACHEABLE_STATUSES:
+        log.warning("places http %s", {
+            "query": query,
+            "status_code": response.status_code,
+            "status": data.get("status"),
+            "error_message": data.get("error_message"),
+        })
 
     response.raise_for_status()
 
+    if data.get("status") not in _CACHEABLE_STATUSES:
+        return None
+
+    places = _places_result(data)
+    _cache_put(cache_key, places)
+    return places
+
+
+def _places_result(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     if data.get("status") != "OK":
         return None
 
@@ -130,7 +234,7 @@ def enrich_candidates_with_places(
     geocode_fn=geocode_location_hint,
 ) -> List[Dict[str, Any]]:
     api_key_present = bool(_get_api_key())
-    print('[worker] places enrichment', {'count': len(candidates), 'has_api_key': api_key_present})
+    log.info('places enrichment %s', {'count': len(candidates), 'has_api_key': api_key_present})
 
     if not api_key_present:
         enriched = []
@@ -138,17 +242,18 @@ def enrich_candidates_with_places(
             name = str(candidate.get('name') or '').strip()
             candidate['places_query'] = name
             candidate['places_failed'] = True
-            print(
-                '[worker] places missing',
-                {
-                    'name': name,
-                    'query': name,
-                    'place_id': None,
-                    'latitude': None,
-                    'longitude': None,
-                    'places_failed': True,
-                },
-            )
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(
+                    'places missing %s',
+                    {
+                        'name': name,
+                        'query': name,
+                        'place_id': None,
+                        'latitude': None,
+                        'longitude': None,
+                        'places_failed': True,
+                    },
+                )
             enriched.append(candidate)
         return enriched
 
@@ -159,77 +264,92 @@ def enrich_candidates_with_places(
         except Exception:
             location_bias = None
 
+    # Lookups are independent network calls: fan them out once per distinct name
+    # (OCR and transcript often yield the same one), then apply results in order
+    names = [str(candidate.get('name') or '').strip() for candidate in candidates]
+    unique_lookups: Dict[str, Future] = {}
+    max_workers = max(1, int(os.getenv('PLACES_MAX_CONCURRENCY', '8')))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for name in names:
+            key = name.lower()
+            if name and key not in unique_lookups:
+                unique_lookups[key] = pool.submit(places_search_fn, name, location_bias)
+    lookups: List[Optional[Future]] = [unique_lookups[name.lower()] if name else None for name in names]
+
     enriched: List[Dict[str, Any]] = []
-    for candidate in candidates:
-        name = str(candidate.get('name') or '').strip()
+    for candidate, name, lookup in zip(candidates, names, lookups):
         candidate['places_query'] = name
-        if not name:
+        if lookup is None:
             candidate['places_failed'] = True
-            print(
-                '[worker] places missing',
-                {
-                    'name': name,
-                    'query': name,
-                    'place_id': None,
-                    'latitude': None,
-                    'longitude': None,
-                    'places_failed': True,
-                },
-            )
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(
+                    'places missing %s',
+                    {
+                        'name': name,
+                        'query': name,
+                        'place_id': None,
+                        'latitude': None,
+                        'longitude': None,
+                        'places_failed': True,
+                    },
+                )
             enriched.append(candidate)
             continue
 
         try:
-            places = places_search_fn(name, location_bias)
+            places = lookup.result()
         except Exception as e:
             candidate['places_failed'] = True
             candidate['places_error'] = repr(e)  # optional column; otherwise just log
-            print('[worker] places exception', {
+            log.warning('places exception %s', {
                 'name': name,
                 'location_hint': location_hint,
                 'location_bias': location_bias,
                 'error': repr(e),
-            }, flush=True)
+            })
             enriched.append(candidate)
             continue
 
         # Log what we actually got back (shape matters)
         if not isinstance(places, dict):
-            print('[worker] places bad return type', {
+            log.warning('places bad return type %s', {
                 'name': name,
                 'type': type(places).__name__,
                 'value_preview': str(places)[:300],
-            }, flush=True)
+            })
             candidate['places_failed'] = True
             enriched.append(candidate)
             continue
 
-        print('[worker] places raw keys', {
-            'name': name,
-            'keys': sorted(list(places.keys()))[:40],
-            'preview': {k: places.get(k) for k in ['places_place_id','places_name','places_address','latitude','longitude']},
-        }, flush=True)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('places raw keys %s', {
+                'name': name,
+                'keys': sorted(list(places.keys()))[:40],
+                'preview': {k: places.get(k) for k in ['places_place_id','places_name','places_address','latitude','longitude']},
+            })
 
         if places.get('latitude') is not None and places.get('longitude') is not None:
             candidate['places_failed'] = False
-            candidate.update(places)
+            # Shallow copy: duplicate names share one lookup result
+            candidate.update(dict(places))
         else:
             candidate['places_failed'] = True
 
 
-        print(
-            '[worker] places result',
-            {
-                'name': name,
-                'query': candidate.get('places_query'),
-                'place_id': candidate.get('places_place_id'),
-                'latitude': candidate.get('latitude'),
-                'longitude': candidate.get('longitude'),
-                'places_failed': candidate.get('places_failed'),
-            },
-        )
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(
+                'places result %s',
+                {
+                    'name': name,
+                    'query': candidate.get('places_query'),
+                    'place_id': candidate.get('places_place_id'),
+                    'latitude': candidate.get('latitude'),
+                    'longitude': candidate.get('longitude'),
+                    'places_failed': candidate.get('places_failed'),
+                },
+            )
 
         enriched.append(candidate)
 
-    print('[worker] places enrichment complete', {'count': len(enriched)})
+    log.info('places enrichment complete %s', {'count': len(enriched)})
     return enriched
@@ -1,7 +1,8 @@
-import json
 import sys
 from pathlib import Path
 
+import orjson
+
 from ollama_extractor import extract_with_ollama
 
 
@@ -11,14 +12,14 @@ def main() -> None:
         sys.exit(1)
 
     path = Path(sys.argv[1])
-    transcript = json.loads(path.read_text())
+    transcript = orjson.loads(path.read_bytes())
     result = extract_with_ollama(transcript, None)
     if result.error:
         print('OLLAMA ERROR:', result.error)
     print('Segment count sent:', result.segment_count)
     print('Raw output:\n', result.output_raw)
     if result.output_json:
-        print('Parsed candidates:', json.dumps(result.output_json, indent=2))
+        print('Parsed candidates:', orjson.dumps(result.output_json, option=orjson.OPT_INDENT_2).decode())
 
 
 if __name__ == '__main__':
@@ -2,7 +2,17 @@ import json
 import os
 from pathlib import Path
 
-from ollama_extractor import extract_with_ollama, filter_segments, normalize_ollama_candidates
+from ollama_extractor import (
+    OllamaResult,
+    _read_chat_stream,
+    _result_cache_get,
+    _result_cache_key,
+    _result_cache_put,
+    extract_with_ollama,
+    filter_segments,
+    normalize_ollama_candidates,
+    pack_segments,
+)
 from pipeline import build_pipeline_candidates
 
 
@@ -57,3 +67,61 @@ def test_list_output_success() -> None:
         [{"name": "Daisy's", "category": "cafe", "evidence": [], "confidence": 1}]
     )
     assert candidates
+
+
+def test_read_chat_stream_stops_after_complete_json() -> None:
+    class FakeResponse:
+        def __init__(self) -> None:
+            self.consumed = 0
+
+        def iter_lines(self, decode_unicode: bool = False):
+            pieces = ['{"candidates": [', '{"name": "Daisy\'s"}', ']}', ' trailing', ' tokens']
+            for piece in pieces:
+                self.consumed += 1
+                yield json.dumps({'message': {'content': piece}, 'done': False})
+
+    resp = FakeResponse()
+    content, error = _read_chat_stream(resp)
+    assert error is None
+    assert json.loads(content) == {'candidates': [{'name': "Daisy's"}]}
+    assert resp.consumed == 3
+
+
+def test_pack_segments_respects_token_budget() -> None:
+    segments = [{'text': 'a' * 40}, {'text': 'b' * 40}, {'text': 'c' * 40}]
+    packed = pack_segments(segments, token_budget=25)
+    assert [seg['text'][0] for seg in packed] == ['a', 'b']
+
+
+def test_pack_segments_stops_before_the_input_char_cap() -> None:
+    segments = [{'start_ms': i * 1000, 'end_ms': i * 1000 + 999, 'text': 'x' * 40} for i in range(10)]
+    packed = pack_segments(segments, token_budget=10_000, max_chars=200)
+
+    assert len(packed) == 2
+    assert len(json.dumps(packed, separators=(',', ':'))) <= 200
+
+
+def test_filter_segments_drops_filler_in_short_transcripts() -> None:
+    fixture_path = Path(__file__).resolve().parents[1] / 'fixtures' / 'transcript_sample.json'
+    transcript = json.loads(fixture_path.read_text())
+    filler = [{'start_ms': 20000 + i * 1000, 'end_ms': 21000 + i * 1000, 'text': 'so yeah'} for i in range(5)]
+
+    filtered = filter_segments(transcript + filler)
+    assert filtered == transcript + filler[:1]
+
+
+def test_result_cache_keys_on_settings_and_expires(monkeypatch, tmp_path) -> None:
+    segments = [{'text': 'we ate at Daisy\'s'}]
+    key = _result_cache_key('prompt', segments)
+    monkeypatch.setenv('OLLAMA_TEMPERATURE', '0.7')
+    assert _result_cache_key('prompt', segments) != key
+
+    path = str(tmp_path / 'cache.sqlite3')
+    result = OllamaResult(
+        candidates=[], prompt='prompt', input_payload={}, output_raw='', output_json=None,
+        error=None, used=True, fallback_reason=None, segment_count=1,
+    )
+    _result_cache_put(path, key, result)
+    assert _result_cache_get(path, key) == result
+    monkeypatch.setenv('OLLAMA_CACHE_TTL_SECONDS', '-1')
+    assert _result_cache_get(path, key) is None
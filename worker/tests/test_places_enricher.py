@@ -1,7 +1,10 @@
 from places_enricher import enrich_candidates_with_places
 
 
-def test_enrich_candidates_with_mock() -> None:
+def test_enrich_candidates_with_mock(monkeypatch) -> None:
+    monkeypatch.setenv('GOOGLE_MAPS_API_KEY', 'test')
+    monkeypatch.setenv('PLACES_CACHE', 'false')
+
     def fake_places_search(query, _bias):
         return {
             'places_name': query,
@@ -21,3 +24,19 @@ def test_enrich_candidates_with_mock() -> None:
     assert enriched[0]['latitude'] == 41.0
     assert enriched[0]['longitude'] == -87.0
     assert enriched[0]['places_failed'] is False
+
+
+def test_enrich_candidates_dedupes_lookups(monkeypatch) -> None:
+    monkeypatch.setenv('GOOGLE_MAPS_API_KEY', 'test')
+    monkeypatch.setenv('PLACES_CACHE', 'false')
+    queries = []
+
+    def fake_places_search(query, _bias):
+        queries.append(query)
+        return {'places_place_id': 'place-123', 'latitude': 41.0, 'longitude': -87.0}
+
+    candidates = [{'name': "Daisy's"}, {'name': "daisy's"}, {'name': 'Ramen San'}]
+    enriched = enrich_candidates_with_places(candidates, None, places_search_fn=fake_places_search)
+
+    assert sorted(queries) == ["Daisy's", 'Ramen San']
+    assert all(candidate['places_failed'] is False for candidate in enriched)
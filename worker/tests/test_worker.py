@@ -0,0 +1,32 @@
+import enum
+import math
+import uuid
+
+import pytest
+
+pytest.importorskip('dotenv')
+pytest.importorskip('supabase')
+
+from worker import prepare_candidate_rows
+
+
+class Source(enum.Enum):
+    OCR = 'ocr'
+
+
+def test_prepare_candidate_rows_keeps_plain_rows() -> None:
+    candidate = {'name': "Daisy's", 'latitude': 41.0, 'longitude': -87.0, 'evidence': {'transcript': []}}
+    [row] = prepare_candidate_rows('video-1', [candidate])
+
+    assert row['evidence'] == {'transcript': []}
+    assert row['places_failed'] is False
+
+
+def test_prepare_candidate_rows_sanitizes_what_stdlib_json_rejects() -> None:
+    place_id = uuid.uuid4()
+    candidate = {'name': "Daisy's", 'places_raw': {'id': place_id}, 'source': Source.OCR, 'confidence': math.nan}
+    [row] = prepare_candidate_rows('video-1', [candidate])
+
+    assert row['places_raw'] == {'id': str(place_id)}
+    assert isinstance(row['source'], str)
+    assert math.isnan(row['confidence'])
@@ -1,27 +1,42 @@
+import atexit
 import json
+import logging
+import logging.handlers
+import multiprocessing
+import multiprocessing.connection
 import os
 import platform
+import queue
+import select
 import subprocess
+import sys
 import time
-import traceback
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
+import httpx
+import orjson
 import requests
-from supabase import Client, create_client
+from supabase import Client, ClientOptions, create_client
 
-from pipeline import (
-    build_pipeline_candidates,
-    extract_audio,
-    ocr_frames,
-    sample_frames,
-    transcribe,
-)
+from ollama_extractor import jsonify
+from pipeline import build_pipeline_candidates, run_pipeline, warm_up_models
 
 POLL_INTERVAL_SECONDS = 2
+# Without LISTEN/NOTIFY, an idle worker doubles its poll interval up to this cap
+MAX_POLL_INTERVAL_SECONDS = 60
+# With LISTEN/NOTIFY active the poll is only a backstop for notifications dropped on reconnect
+JOB_CHANNEL = 'video_jobs_new'
+BACKSTOP_POLL_SECONDS = 30
+LISTEN_MAX_BACKOFF_SECONDS = 60
+_JSON_PRIMITIVES = (str, int, float, bool)
+# Exact-type membership is a single hash lookup; isinstance() only runs for subclasses
+_FAST_TYPES = frozenset((str, int, float, bool, type(None)))
 print("[worker] STARTED", __file__, "pid=", os.getpid(), flush=True)
 
+log = logging.getLogger('worker')
+_LOG_LISTENER_PID: Optional[int] = None
+
 OLLAMA_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
 OLLAMA_HEALTH_ENDPOINT = f"{OLLAMA_BASE_URL}/api/tags"
 
@@ -61,7 +76,13 @@ def _ollama_warm_model(model: str) -> None:
 	try:
 		requests.post(
 			f"{OLLAMA_BASE_URL}/api/generate",
-			json={'model': model, 'prompt': 'Hello', 'stream': False},
+			# An empty prompt only loads the model; keep_alive keeps it resident for later jobs
+			json={
+				'model': model,
+				'prompt': '',
+				'stream': False,
+				'keep_alive': os.getenv('OLLAMA_KEEP_ALIVE', '30m'),
+			},
 			timeout=10,
 		)
 	except Exception:
@@ -95,50 +116,153 @@ def ensure_ollama_ready() -> None:
 
 	_ollama_warm_model(model)
 
-def now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
 def build_supabase() -> Client:
     supabase_url = os.getenv('SUPABASE_URL')
     supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
     if not supabase_url or not supabase_key:
         raise RuntimeError('SUPABASE_URL and SUPABASE_SERVICE_KEY must be set')
-    return create_client(supabase_url, supabase_key)
+    # One long-lived HTTP/2 pool shared by every PostgREST call, so the several status
+    # updates per job multiplex over an already-handshaked connection
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=20, keepalive_expiry=300),
+        http2=True,
+        timeout=30,
+        follow_redirects=True,
+    )
+    return create_client(supabase_url, supabase_key, options=ClientOptions(httpx_client=http_client))
+
+
+class JobNotifier:
+    """Block on Postgres NOTIFY for new video_jobs rows, reconnecting with exponential backoff."""
+
+    def __init__(self, dsn: str) -> None:
+        self.dsn = dsn
+        self.conn: Any = None
+        self.backoff = 1.0
+
+    def _connect(self) -> None:
+        import psycopg2
+        import psycopg2.extensions
+
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {JOB_CHANNEL};')
+        self.conn = conn
+
+    def _disconnect(self) -> None:
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+        self.conn = None
+
+    def wait(self, timeout: float) -> None:
+        """Return when a job may be available: on NOTIFY, after timeout, or right after (re)connecting."""
+        if self.conn is None:
+            try:
+                self._connect()
+                self.backoff = 1.0
+                # Jobs inserted while we were not listening produced no notification
+                return
+            except Exception as exc:
+                log.warning('job listener connect failed %r', exc)
+                time.sleep(min(self.backoff, timeout))
+                self.backoff = min(self.backoff * 2, LISTEN_MAX_BACKOFF_SECONDS)
+                return
+        try:
+            if select.select([self.conn], [], [], timeout) == ([], [], []):
+                return
+            self.conn.poll()
+            self.conn.notifies.clear()
+        except Exception as exc:
+            log.warning('job listener lost connection %r', exc)
+            self._disconnect()
+
+
+def build_job_notifier() -> Optional[JobNotifier]:
+    # The REST URL carries no DB credentials, so the direct Postgres URL is configured separately
+    dsn = os.getenv('SUPABASE_DB_URL')
+    return JobNotifier(dsn) if dsn else None
+
+
+class ResultsDb:
+    """Direct Postgres connection for the large result write, reused across jobs."""
+
+    def __init__(self, dsn: str) -> None:
+        self.dsn = dsn
+        self.conn: Any = None
+
+    def write_results(
+        self,
+        video_id: str,
+        transcript_segments: List[Dict[str, int | str]],
+        rows: List[Dict[str, Any]],
+    ) -> None:
+        import psycopg2
+        from psycopg2.extras import Json
+
+        if self.conn is None or self.conn.closed:
+            self.conn = psycopg2.connect(self.dsn)
+        # Same function as the RPC path, minus PostgREST re-parsing the (often large) body;
+        # `with conn` commits on success and rolls back on error
+        with self.conn, self.conn.cursor() as cursor:
+            cursor.execute(
+                'select public.write_results(%s, %s, %s)',
+                (video_id, Json(transcript_segments, dumps=_orjson_text), Json(rows, dumps=_orjson_text)),
+            )
+
+
+def _orjson_text(value: Any) -> str:
+    return orjson.dumps(value).decode()
+
+
+def build_results_db() -> Optional[ResultsDb]:
+    dsn = os.getenv('SUPABASE_DB_URL')
+    return ResultsDb(dsn) if dsn else None
 
 
 def fetch_next_job(supabase: Client) -> Optional[Dict[str, Any]]:
-    response = (
-        supabase.table('video_jobs')
-        .select('*')
-        .eq('status', 'queued')
-        .order('created_at', desc=False)
-        .limit(1)
-        .execute()
-    )
+    # Select and claim in one round-trip; rows locked by another worker are skipped, not raced
+    response = supabase.rpc('claim_next_video_job').execute()
     jobs = response.data or []
     return jobs[0] if jobs else None
 
 
-def claim_job(supabase: Client, job_id: str) -> bool:
-    response = (
-        supabase.table('video_jobs')
-        .update({
-            'status': 'processing',
-            'progress': 0,
-            'updated_at': now_iso(),
-        })
-        .eq('id', job_id)
-        .eq('status', 'queued')
-        .execute()
-    )
-    return bool(response.data)
-
-
 def update_video_status(supabase: Client, video_id: str, status: str) -> None:
     supabase.table('videos').update({'status': status}).eq('id', video_id).execute()
 
 
+def mark_job_and_video(
+    supabase: Client,
+    job_id: str,
+    video_id: str,
+    status: str,
+    progress: int,
+    error: Optional[str] = None,
+) -> None:
+    supabase.rpc(
+        'mark_job_and_video',
+        {
+            'p_job_id': job_id,
+            'p_video_id': video_id,
+            'p_status': status,
+            'p_progress': progress,
+            'p_error': error,
+        },
+    ).execute()
+
+
+def safe_json_string(value: Any) -> str:
+	try:
+		return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+	except (ValueError, TypeError) as exc:
+		preview = repr(value)
+		if len(preview) > 500:
+			preview = preview[:500] + '...'
+		return f"<<unserializable: {type(value).__name__}: {exc}>> {preview}"
+
+
 def update_job_status(
 	supabase: Client,
 	job_id: str,
@@ -147,19 +271,9 @@ def update_job_status(
 	error: Optional[str] = None,
 	meta: Optional[Dict[str, Any]] = None,
 ) -> None:
-	def safe_json_string(value: Any) -> str:
-		try:
-			return json.dumps(value, ensure_ascii=False, default=str)
-		except (ValueError, TypeError) as exc:
-			preview = repr(value)
-			if len(preview) > 500:
-				preview = preview[:500] + '...'
-			return f"<<unserializable: {type(value).__name__}: {exc}>> {preview}"
-
 	payload: Dict[str, Any] = {
 		'status': status,
 		'progress': progress,
-		'updated_at': now_iso(),
 	}
 	if error is not None:
 		payload['error'] = error
@@ -169,12 +283,9 @@ def update_job_status(
 	# Sanitize payload to JSON-primitive-safe values
 	safe_payload: Dict[str, Any] = {}
 	for key, value in payload.items():
-		if value is None or isinstance(value, (str, int, float, bool)):
+		if type(value) in _FAST_TYPES or isinstance(value, _JSON_PRIMITIVES):
 			safe_payload[key] = value
 			continue
-		if isinstance(value, (dict, list, tuple)):
-			safe_payload[key] = safe_json_string(value)
-			continue
 		safe_payload[key] = safe_json_string(value)
 
 	supabase.table('video_jobs').update(safe_payload).eq('id', job_id).execute()
@@ -186,37 +297,39 @@ def load_video(supabase: Client, video_id: str) -> Optional[Dict[str, Any]]:
     return records[0] if records else None
 
 
-def write_candidates(supabase: Client, video_id: str, candidates: List[Dict[str, Any]]) -> None:
-	if not candidates:
-		return
+def _safe_field(value: Any) -> Any:
+	if type(value) in _FAST_TYPES or isinstance(value, _JSON_PRIMITIVES):
+		return value
+	# Containers stay native (the client encodes the body once) instead of
+	# round-tripping through a dumps/loads pair here
+	if isinstance(value, (dict, list, tuple)):
+		return jsonify(value)
+	return safe_json_string(value)
 
-	print('[worker] preparing candidates for insert', {'count': len(candidates)})
 
-	def safe_json_string(value: Any) -> str:
-		try:
-			return json.dumps(value, ensure_ascii=False, default=str)
-		except (ValueError, TypeError) as exc:
-			preview = repr(value)
-			if len(preview) > 500:
-				preview = preview[:500] + '...'
-			return f"<<unserializable: {type(value).__name__}: {exc}>> {preview}"
-
-	def find_json_issue(value: Any, path: str = 'root') -> Optional[Dict[str, Any]]:
-		try:
-			json.dumps(value)
-			return None
-		except Exception as exc:
-			if isinstance(value, dict):
-				for key, child in value.items():
-					result = find_json_issue(child, f"{path}.{key}")
-					if result:
-						return result
-			elif isinstance(value, list):
-				for idx, child in enumerate(value):
-					result = find_json_issue(child, f"{path}[{idx}]")
-					if result:
-						return result
-			return {'path': path, 'type': type(value).__name__, 'error': repr(exc)}
+def find_json_issue(value: Any, path: str = 'root') -> Optional[Dict[str, Any]]:
+	try:
+		json.dumps(value)
+		return None
+	except Exception as exc:
+		if isinstance(value, dict):
+			for key, child in value.items():
+				result = find_json_issue(child, f"{path}.{key}")
+				if result:
+					return result
+		elif isinstance(value, list):
+			for idx, child in enumerate(value):
+				result = find_json_issue(child, f"{path}[{idx}]")
+				if result:
+					return result
+		return {'path': path, 'type': type(value).__name__, 'error': repr(exc)}
+
+
+def prepare_candidate_rows(video_id: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+	if not candidates:
+		return []
+
+	log.info('preparing candidates for insert %s', {'count': len(candidates)})
 
 	safe_payload: List[Dict[str, Any]] = []
 	for idx, candidate in enumerate(candidates):
@@ -232,23 +345,8 @@ def write_candidates(supabase: Client, video_id: str, candidates: List[Dict[str,
 		if row.get('latitude') is None or row.get('longitude') is None:
 			row['places_failed'] = True
 
-		issue = find_json_issue(row)
-		if issue:
-			print(
-				'[worker] candidate serialization error',
-				{'index': idx, 'path': issue['path'], 'type': issue['type'], 'error': issue['error']},
-			)
-
 		# sanitize row: ensure JSON-safe values
-		safe_row: Dict[str, Any] = {}
-		for key, value in row.items():
-			if value is None or isinstance(value, (str, int, float, bool)):
-				safe_row[key] = value
-				continue
-			if isinstance(value, (dict, list, tuple)):
-				safe_row[key] = json.loads(safe_json_string(value))
-				continue
-			safe_row[key] = safe_json_string(value)
+		safe_row: Dict[str, Any] = {key: _safe_field(value) for key, value in row.items()}
 
 		# ensure LLM outputs are stored as text or safe JSON
 		if 'llm_output' in safe_row and not isinstance(safe_row['llm_output'], (str, type(None))):
@@ -257,9 +355,9 @@ def write_candidates(supabase: Client, video_id: str, candidates: List[Dict[str,
 		if 'llm_prompt' in safe_row and not isinstance(safe_row['llm_prompt'], (str, type(None))):
 			safe_row['llm_prompt'] = safe_json_string(safe_row['llm_prompt'])
 
-		if idx < 2:
-			print(
-				'[worker] candidate payload sample',
+		if idx < 2 and log.isEnabledFor(logging.DEBUG):
+			log.debug(
+				'candidate payload sample %s',
 				{
 					'index': idx,
 					'name': safe_row.get('name'),
@@ -273,29 +371,55 @@ def write_candidates(supabase: Client, video_id: str, candidates: List[Dict[str,
 
 		safe_payload.append(safe_row)
 
-	supabase.table('video_candidates').insert(safe_payload).execute()
+	return safe_payload
 
 
-def write_transcript(supabase: Client, video_id: str, transcript_segments: List[Dict[str, int | str]]) -> None:
-    supabase.table('video_transcripts').insert(
-        {
-            'video_id': video_id,
-            'transcript': transcript_segments,
-        }
-    ).execute()
+def write_results(
+    supabase: Client,
+    video_id: str,
+    transcript_segments: List[Dict[str, int | str]],
+    candidates: List[Dict[str, Any]],
+    results_db: Optional[ResultsDb] = None,
+) -> None:
+    # Transcript and candidates go in one call: one round-trip and one transaction
+    rows = prepare_candidate_rows(video_id, candidates)
+    try:
+        if results_db is not None:
+            results_db.write_results(video_id, transcript_segments, rows)
+        else:
+            supabase.rpc(
+                'write_results',
+                {'p_video_id': video_id, 'p_transcript': transcript_segments, 'p_candidates': rows},
+            ).execute()
+    except Exception:
+        # The recursive scan re-serializes every subtree, so it only runs to explain a failure
+        for idx, row in enumerate(rows):
+            issue = find_json_issue(row)
+            if issue:
+                log.warning(
+                    'candidate serialization error %s',
+                    {'index': idx, 'path': issue['path'], 'type': issue['type'], 'error': issue['error']},
+                )
+        raise
 
 
-def process_video(video: Dict[str, Any], supabase: Client, job_id: str) -> List[Dict[str, Any]]:
+def process_video(
+    video: Dict[str, Any],
+    supabase: Client,
+    job_id: str,
+) -> Tuple[List[Dict[str, int | str]], List[Dict[str, Any]]]:
     video_path = video.get('storage_path')
-    if not video_path or not os.path.exists(video_path):
+    if not video_path:
         raise RuntimeError('Video file not found on disk')
+    # One stat both validates the path and gives the size for the job log
+    try:
+        video_size = os.stat(video_path).st_size
+    except OSError as exc:
+        raise RuntimeError('Video file not found on disk') from exc
 
-    audio_path = extract_audio(video_path)
-    transcript_segments = transcribe(audio_path)
-    write_transcript(supabase, video['id'], transcript_segments)
-
-    frames = sample_frames(video_path)
-    ocr_lines = ocr_frames(frames)
+    # run_pipeline overlaps the audio and frame branches; the transcript is written
+    # together with the candidates once they are ready (see write_results)
+    transcript_segments, ocr_lines = run_pipeline(video_path)
 
     location_hint = video.get('location_hint')
     candidates, ollama_meta = build_pipeline_candidates(transcript_segments, ocr_lines, location_hint)
@@ -316,57 +440,130 @@ def process_video(video: Dict[str, Any], supabase: Client, job_id: str) -> List[
         },
     )
 
-    print(
-        f"[worker] transcript segments: {len(transcript_segments)}, "
-        f"ocr lines: {len(ocr_lines)}, candidates: {len(candidates)}"
+    log.info(
+        'video bytes: %d, transcript segments: %d, ocr lines: %d, candidates: %d',
+        video_size,
+        len(transcript_segments),
+        len(ocr_lines),
+        len(candidates),
     )
 
-    return candidates
-
-
-def main() -> None:
-    load_dotenv()
-    try:
-        ensure_ollama_ready()
-    except Exception as exc:
-        print('[worker] Ollama init failed', repr(exc))
-        raise
+    return transcript_segments, candidates
+
+
+def configure_logging() -> None:
+    """Route all logging through a queue so stderr writes happen on a listener thread, not the job loop."""
+    global _LOG_LISTENER_PID
+    # Set up once per process; a child that inherited the handlers would not have the listener thread
+    if _LOG_LISTENER_PID == os.getpid():
+        return
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter('[%(name)s] %(message)s'))
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(records)]
+    # Third-party loggers stay at WARNING: httpx alone logs an INFO line per request, idle polls included.
+    # Our own loggers (worker, worker.places) follow LOG_LEVEL; DEBUG restores per-candidate detail.
+    root.setLevel(logging.WARNING)
+    log.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    listener = logging.handlers.QueueListener(records, stream)
+    listener.start()
+    atexit.register(listener.stop)
+    _LOG_LISTENER_PID = os.getpid()
+
+
+def run_worker() -> None:
+    # Each process builds its own client, so every child gets its own HTTP pool and listener
+    configure_logging()
     supabase = build_supabase()
+    notifier = build_job_notifier()
+    results_db = build_results_db()
+    if os.getenv('WARM_UP_MODELS', 'true').lower() == 'true':
+        try:
+            warm_up_models()
+        except Exception as exc:
+            # Not fatal: the first job loads the models itself and reports the real error
+            log.warning('model warm-up failed %r', exc)
 
+    idle_sleep = POLL_INTERVAL_SECONDS
     while True:
         job = fetch_next_job(supabase)
         if not job:
-            time.sleep(POLL_INTERVAL_SECONDS)
+            if notifier:
+                notifier.wait(BACKSTOP_POLL_SECONDS)
+            else:
+                time.sleep(idle_sleep)
+                idle_sleep = min(idle_sleep * 2, MAX_POLL_INTERVAL_SECONDS)
             continue
+        idle_sleep = POLL_INTERVAL_SECONDS
 
         job_id = job['id']
         video_id = job['video_id']
 
-        if not claim_job(supabase, job_id):
-            continue
-
         try:
+            # The claim already marked the job processing; only the video row is left
             update_video_status(supabase, video_id, 'processing')
-            update_job_status(supabase, job_id, 'processing', 10)
 
             video = load_video(supabase, video_id)
             if not video:
                 raise RuntimeError('Video record not found')
 
-            candidates = process_video(video, supabase, job_id)
-            update_job_status(supabase, job_id, 'processing', 80)
-            write_candidates(supabase, video_id, candidates)
+            transcript_segments, candidates = process_video(video, supabase, job_id)
+            write_results(supabase, video_id, transcript_segments, candidates, results_db)
 
-            update_job_status(supabase, job_id, 'done', 100)
-            update_video_status(supabase, video_id, 'done')
+            mark_job_and_video(supabase, job_id, video_id, 'done', 100)
         except Exception as exc:
-            print(
-                "[worker] job failed",
-                {"job_id": job_id, "video_id": job.get("video_id"), "error": repr(exc)},
+            # One record carrying the traceback instead of a print plus print_exc
+            log.exception(
+                'job failed job_id=%s video_id=%s',
+                job_id,
+                video_id,
+                extra={'job_id': job_id, 'video_id': video_id},
             )
-            traceback.print_exc()
-            update_job_status(supabase, job_id, 'failed', 100, str(exc))
-            update_video_status(supabase, video_id, 'failed')
+            mark_job_and_video(supabase, job_id, video_id, 'failed', 100, str(exc))
+
+
+def run_worker_pool(n: int) -> None:
+    """Run n independent worker processes; the SKIP LOCKED claim keeps them off each other's jobs."""
+    # spawn, not fork: main() has already started the logging listener thread, and forking a
+    # threaded process can copy a held logging lock into the child and deadlock it
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=run_worker, name=f'worker-{index}')
+        for index in range(n)
+    ]
+    for process in processes:
+        process.start()
+    print(f'[worker] started {n} worker processes', flush=True)
+    # run_worker only returns by raising, so any exit is a crash. Take the whole pool down
+    # with a non-zero status, as a crash does in single-process mode, and let the
+    # supervisor restart it rather than limping on with fewer workers.
+    exited = multiprocessing.connection.wait([process.sentinel for process in processes])
+    for process in processes:
+        if process.sentinel in exited:
+            process.join()
+            log.error('worker process %s exited with status %s', process.name, process.exitcode)
+        else:
+            process.terminate()
+    for process in processes:
+        process.join()
+    sys.exit(1)
+
+
+def main() -> None:
+    load_dotenv()
+    configure_logging()
+    try:
+        ensure_ollama_ready()
+    except Exception as exc:
+        print('[worker] Ollama init failed', repr(exc))
+        raise
+
+    concurrency = int(os.getenv('WORKER_CONCURRENCY', '1'))
+    if concurrency > 1:
+        run_worker_pool(concurrency)
+    else:
+        run_worker()
 
 
 if __name__ == '__main__':